@@ -1,18 +1,27 @@
 import tempfile
 import os
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends
+import asyncio
+import hashlib
+import time
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
+from fastapi.encoders import jsonable_encoder
+from fastapi.concurrency import run_in_threadpool
 import httpx
-from typing import List, Dict
+from typing import List, Dict, Optional
 from pydantic import BaseModel
 import json
-from sqlalchemy.orm import Session
-from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+import uuid
 import csv
 from io import StringIO
 from pathlib import Path
+from functools import lru_cache
+from collections import OrderedDict
 
 from models import Base, SalesOrder, LineItem
 from database import engine, get_db
@@ -20,12 +29,27 @@ from database import engine, get_db
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+# create_all skips existing tables, so add any indexes missing from older databases
+for table in Base.metadata.sorted_tables:
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
+
 # API endpoints
 EXTRACTION_API = "https://plankton-app-qajlk.ondigitalocean.app"  # PDF extraction API
 MATCHING_API = "https://endeavor-interview-api-gzwki.ondigitalocean.app"  # Matching API
 
+# Outbound request limits per external API, and retries for transient failures.
+# The limits are totals across all workers, so each worker process gets its share
+# of them; WEB_CONCURRENCY is the worker count uvicorn also reads for --workers.
+API_WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+EXTRACTION_API_CONCURRENCY = max(1, int(os.getenv("EXTRACTION_API_CONCURRENCY", "20")) // API_WORKERS)
+MATCHING_API_CONCURRENCY = max(1, int(os.getenv("MATCHING_API_CONCURRENCY", "20")) // API_WORKERS)
+API_MAX_ATTEMPTS = 3
+API_RETRY_BACKOFF = 0.5  # seconds, doubled after each failed attempt
+
 # Create FastAPI app
-app = FastAPI(title="Sales Order Processing API")
+# Serialize JSON responses with orjson instead of the stdlib encoder
+app = FastAPI(title="Sales Order Processing API", default_response_class=ORJSONResponse)
 
 # Configure CORS first
 app.add_middleware(
@@ -36,13 +60,78 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger responses such as the catalog and CSV exports
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+@app.on_event("startup")
+async def startup():
+    # Share one client so connections to the external APIs are kept alive
+    app.state.http = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=1000, max_keepalive_connections=100),
+        timeout=httpx.Timeout(60.0)
+    )
+    app.state.extraction_limit = asyncio.Semaphore(EXTRACTION_API_CONCURRENCY)
+    app.state.matching_limit = asyncio.Semaphore(MATCHING_API_CONCURRENCY)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await app.state.http.aclose()
+
 # Create upload directory if it doesn't exist
 UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Hash uploads 1 MB at a time
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Flush CSV exports roughly 64 KB at a time
+EXPORT_CHUNK_SIZE = 64 * 1024
+
 # Mount the uploads directory
 app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
 
+# Get the absolute path to the catalog file
+CATALOG_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "unique_fastener_catalog.csv")
+
+@lru_cache(maxsize=1)
+def _load_catalog(mtime):
+    """Parse the catalog CSV once per file modification time."""
+    catalog_items = []
+    catalog_index = {}
+    with open(CATALOG_FILE, "r", encoding="utf-8") as file:
+        reader = csv.DictReader(file)
+        for row in reader:
+            # Create a unique ID from the combination of fields
+            item_id = f"{row['Type']}_{row['Material']}_{row['Size']}_{row['Length']}_{row['Coating']}_{row['Thread Type']}"
+            # The matching API returns the space-separated name
+            item_name = f"{row['Type']} {row['Material']} {row['Size']} {row['Length']} {row['Coating']} {row['Thread Type']}"
+            catalog_items.append({
+                "id": item_id,
+                "name": item_name,
+                "description": row["Description"]
+            })
+            catalog_index.setdefault(item_name, {
+                "id": item_name,
+                "name": item_name,
+                "description": row["Description"]
+            })
+    return catalog_items, catalog_index
+
+def _catalog_items():
+    """Get the parsed catalog items, reloading if the file has changed."""
+    return _load_catalog(os.path.getmtime(CATALOG_FILE))[0]
+
+def _catalog_index():
+    """Get catalog items keyed by the name the matching API returns."""
+    return _load_catalog(os.path.getmtime(CATALOG_FILE))[1]
+
+def _warm_catalog():
+    """Load the catalog into the cache ahead of matching."""
+    try:
+        _catalog_index()
+    except Exception as e:
+        print(f"Warning: Could not load catalog file: {str(e)}")
+
 class LineItemBase(BaseModel):
     description: str
     quantity: int
@@ -73,48 +162,55 @@ COLUMN_MAPPINGS = {
     "total_price": ["Total", "Total Price", "Extended Price", "Line Total"]
 }
 
-def find_matching_column(item, column_type):
-    """Find the matching column name in the item dictionary."""
-    possible_names = COLUMN_MAPPINGS.get(column_type, [])
-    for name in possible_names:
-        if name in item:
-            return name
-    return None
+# Reverse lookup from column name to (column type, priority within its mapping)
+COLUMN_ALIASES = {
+    name: (column_type, priority)
+    for column_type, possible_names in COLUMN_MAPPINGS.items()
+    for priority, name in enumerate(possible_names)
+}
 
 def transform_extracted_item(item):
     """Transform an extracted item into our standard format."""
     transformed = {}
     
-    # Find and map description
-    desc_key = find_matching_column(item, "description")
-    if not desc_key:
+    # Map columns in one pass, preferring names listed earlier in COLUMN_MAPPINGS
+    mapped = {}
+    mapped_priority = {}
+    for key, value in item.items():
+        alias = COLUMN_ALIASES.get(key)
+        if alias is None:
+            continue
+        column_type, priority = alias
+        if priority < mapped_priority.get(column_type, len(COLUMN_MAPPINGS[column_type])):
+            mapped[column_type] = value
+            mapped_priority[column_type] = priority
+    
+    # Map description
+    if "description" not in mapped:
         raise ValueError("Could not find description field in extracted data")
-    transformed["description"] = item[desc_key]
+    transformed["description"] = mapped["description"]
     
-    # Find and map quantity
-    qty_key = find_matching_column(item, "quantity")
-    if not qty_key:
+    # Map quantity
+    if "quantity" not in mapped:
         raise ValueError("Could not find quantity field in extracted data")
     try:
-        transformed["quantity"] = int(item[qty_key])
+        transformed["quantity"] = int(mapped["quantity"])
     except (ValueError, TypeError):
         transformed["quantity"] = 0
     
-    # Find and map unit price
-    price_key = find_matching_column(item, "unit_price")
-    if price_key and item[price_key] is not None:
+    # Map unit price
+    if mapped.get("unit_price") is not None:
         try:
-            transformed["unit_price"] = float(item[price_key])
+            transformed["unit_price"] = float(mapped["unit_price"])
         except (ValueError, TypeError):
             transformed["unit_price"] = 0.0
     else:
         transformed["unit_price"] = 0.0
     
-    # Find and map total price
-    total_key = find_matching_column(item, "total_price")
-    if total_key and item[total_key] is not None:
+    # Map total price
+    if mapped.get("total_price") is not None:
         try:
-            transformed["total_price"] = float(item[total_key])
+            transformed["total_price"] = float(mapped["total_price"])
         except (ValueError, TypeError):
             transformed["total_price"] = transformed["quantity"] * transformed["unit_price"]
     else:
@@ -122,192 +218,275 @@ def transform_extracted_item(item):
     
     return transformed
 
+# Extraction and match results keyed by PDF SHA-256, so re-uploads skip the external APIs
+UPLOAD_CACHE_TTL = 24 * 60 * 60
+UPLOAD_CACHE_SIZE = 256
+_upload_cache = OrderedDict()
+
+def _get_cached_upload(digest):
+    """Get cached (transformed_items, batch_matches) for a PDF digest, if still fresh."""
+    entry = _upload_cache.get(digest)
+    if entry is None:
+        return None
+    expires_at, result = entry
+    if expires_at < time.monotonic():
+        del _upload_cache[digest]
+        return None
+    _upload_cache.move_to_end(digest)
+    return result
+
+def _cache_upload(digest, transformed_items, batch_matches):
+    """Cache extraction and match results for a PDF digest."""
+    _upload_cache[digest] = (time.monotonic() + UPLOAD_CACHE_TTL, (transformed_items, batch_matches))
+    _upload_cache.move_to_end(digest)
+    while len(_upload_cache) > UPLOAD_CACHE_SIZE:
+        _upload_cache.popitem(last=False)
+
+def _hash_upload(upload_file):
+    """Compute the SHA-256 hex digest of an uploaded file and rewind it."""
+    upload_hash = hashlib.sha256()
+    while True:
+        chunk = upload_file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        upload_hash.update(chunk)
+    upload_file.seek(0)
+    return upload_hash.hexdigest()
+
+async def _post_with_retry(limit, url, rewind=None, **kwargs):
+    """POST to an external API under a concurrency limit, retrying transport errors and 5xx responses."""
+    for attempt in range(API_MAX_ATTEMPTS):
+        last_attempt = attempt == API_MAX_ATTEMPTS - 1
+        if rewind:
+            rewind()
+        try:
+            async with limit:
+                response = await app.state.http.post(url, **kwargs)
+        except httpx.TransportError as e:
+            if last_attempt:
+                raise
+            print(f"Request to {url} failed, retrying: {str(e)}")
+        else:
+            if response.status_code < 500 or last_attempt:
+                return response
+            print(f"Request to {url} returned {response.status_code}, retrying")
+        await asyncio.sleep(API_RETRY_BACKOFF * 2 ** attempt)
+
+class _UploadStream:
+    """File-like view of an upload without fileno(), so httpx can't roll it over to disk."""
+
+    def __init__(self, upload_file):
+        self._file = upload_file
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
 @app.post("/upload", response_model=dict)
 async def upload_pdf(file: UploadFile = File(...), db: Session = Depends(get_db)):
     """Upload a PDF file for processing."""
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
     
-    # Create unique filename with timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    # Create unique filename with a random prefix; created_at records the upload time
     original_filename = file.filename
-    unique_filename = f"{timestamp}_{original_filename}"
+    unique_filename = f"{uuid.uuid4().hex}_{original_filename}"
+    
+    # Hash the upload in a worker thread; the spooled upload is forwarded as-is
+    upload_digest = await run_in_threadpool(_hash_upload, file.file)
+    
+    cached = _get_cached_upload(upload_digest)
+    if cached:
+        print(f"Using cached extraction and matches for: {original_filename}")
+        transformed_items, batch_matches = cached
+    else:
+        # Call extraction API, streaming the upload straight into the request body
+        print(f"Calling extraction API with file: {original_filename}")
+        # Load the catalog while waiting on the extraction API
+        response, _ = await asyncio.gather(
+            _post_with_retry(
+                app.state.extraction_limit,
+                f"{EXTRACTION_API}/extraction_api",
+                rewind=lambda: file.file.seek(0),
+                files={"file": (original_filename, _UploadStream(file.file), "application/pdf")}
+            ),
+            run_in_threadpool(_warm_catalog)
+        )
+        print(f"Extraction API response status: {response.status_code}")
+        if response.status_code != 200:
+            print(f"Extraction API error: {response.text}")
+            raise HTTPException(status_code=response.status_code, detail=f"PDF extraction failed: {response.text}")
+        
+        extracted_items = response.json()
+        print(f"Extracted data: {extracted_items}")
+        
+        # Transform extracted data to match our expected format
+        transformed_items = []
+        for item in extracted_items:
+            try:
+                transformed_item = transform_extracted_item(item)
+                transformed_items.append(transformed_item)
+            except ValueError as e:
+                print(f"Warning: Skipping item due to error: {str(e)}")
+                print(f"Item data: {item}")
+                continue
+        
+        if not transformed_items:
+            raise HTTPException(status_code=400, detail="No valid items could be extracted from the PDF")
     
-    # Save the file to the uploads directory
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
-    with open(file_path, "wb") as pdf_file:
-        content = await file.read()
-        pdf_file.write(content)
+    # Create sales order in database with unique filename
+    db_order = SalesOrder(
+        filename=unique_filename,
+        original_filename=original_filename,
+        status="pending"
+    )
+    db.add(db_order)
+    db.commit()
+    
+    if not cached:
+        # Match each distinct description once; results are keyed by description
+        descriptions = list(dict.fromkeys(item["description"] for item in transformed_items))
+        print(f"Descriptions to match: {descriptions}")
+        
+        # Call batch match API
+        print("Calling batch match API")
+        batch_response = await _post_with_retry(
+            app.state.matching_limit,
+            f"{MATCHING_API}/match/batch",
+            json={"queries": descriptions}  # Remove limit parameter as it's in query params
+        )
+        print(f"Batch match API response status: {batch_response.status_code}")
+        print(f"Raw response: {batch_response.text}")
+        
+        if batch_response.status_code != 200:
+            print(f"Batch match API error: {batch_response.text}")
+            raise HTTPException(status_code=batch_response.status_code, detail=f"Batch matching failed: {batch_response.text}")
+        
+        batch_matches = batch_response.json()
+        print(f"Parsed batch matches: {batch_matches}")
+        _cache_upload(upload_digest, transformed_items, batch_matches)
     
+    # Get catalog item details once for the whole order
     try:
-        # Call extraction API
-        async with httpx.AsyncClient() as client:
-            with open(file_path, "rb") as pdf_file:
-                print(f"Calling extraction API with file: {original_filename}")
-                response = await client.post(
-                    f"{EXTRACTION_API}/extraction_api",
-                    files={"file": (original_filename, pdf_file, "application/pdf")}
-                )
-                print(f"Extraction API response status: {response.status_code}")
-                if response.status_code != 200:
-                    print(f"Extraction API error: {response.text}")
-                    raise HTTPException(status_code=response.status_code, detail=f"PDF extraction failed: {response.text}")
-                
-                extracted_items = response.json()
-                print(f"Extracted data: {extracted_items}")
-                
-                # Transform extracted data to match our expected format
-                transformed_items = []
-                for item in extracted_items:
-                    try:
-                        transformed_item = transform_extracted_item(item)
-                        transformed_items.append(transformed_item)
-                    except ValueError as e:
-                        print(f"Warning: Skipping item due to error: {str(e)}")
-                        print(f"Item data: {item}")
-                        continue
-                
-                if not transformed_items:
-                    raise HTTPException(status_code=400, detail="No valid items could be extracted from the PDF")
-                
-                # Create sales order in database with unique filename
-                db_order = SalesOrder(
-                    filename=unique_filename,
-                    original_filename=original_filename,
-                    status="pending"
-                )
-                db.add(db_order)
-                db.commit()
-                db.refresh(db_order)
-                
-                # Process line items
-                matched_items = []
-                descriptions = [item["description"] for item in transformed_items]
-                print(f"Descriptions to match: {descriptions}")
-                
-                # Call batch match API
-                print("Calling batch match API")
-                batch_response = await client.post(
-                    f"{MATCHING_API}/match/batch",
-                    json={"queries": descriptions}  # Remove limit parameter as it's in query params
-                )
-                print(f"Batch match API response status: {batch_response.status_code}")
-                print(f"Raw response: {batch_response.text}")
-                
-                if batch_response.status_code == 200:
-                    batch_matches = batch_response.json()
-                    print(f"Parsed batch matches: {batch_matches}")
-                    
-                    # Process matches from the results dictionary
-                    matched_items = []
-                    for item in transformed_items:
-                        description = item["description"]
-                        matches = batch_matches.get("results", {}).get(description, [])
-                        print(f"Matches for {description}: {matches}")
-                        
-                        if matches and len(matches) > 0:
-                            best_match = matches[0]
-                            confidence = float(best_match.get("score", 0))  # Convert to float
-                            catalog_match = best_match.get("match")
-                            
-                            # Get catalog item details
-                            catalog_item = None
-                            try:
-                                with open(CATALOG_FILE, "r", encoding="utf-8") as file:
-                                    reader = csv.DictReader(file)
-                                    for row in reader:
-                                        # Create a unique ID that matches what the API returns
-                                        item_description = f"{row['Type']} {row['Material']} {row['Size']} {row['Length']} {row['Coating']} {row['Thread Type']}"
-                                        if item_description == catalog_match:
-                                            catalog_item = {
-                                                "id": catalog_match,
-                                                "name": item_description,
-                                                "description": row["Description"]
-                                            }
-                                            break
-                            except Exception as e:
-                                print(f"Error finding catalog item: {str(e)}")
-                            
-                            # Create line item in database
-                            db_line_item = LineItem(
-                                sales_order_id=db_order.id,
-                                description=item["description"],
-                                quantity=item["quantity"],
-                                unit_price=item["unit_price"],
-                                total_price=item["total_price"],
-                                catalog_match_id=catalog_match,
-                                catalog_match_data={
-                                    "id": catalog_match,
-                                    "name": catalog_match,
-                                    "description": catalog_match
-                                } if catalog_match else None,
-                                confidence_score=confidence,
-                                status="pending"
-                            )
-                            db.add(db_line_item)
-                            
-                            matched_items.append({
-                                "line_item": item,
-                                "catalog_match": catalog_item,
-                                "confidence": confidence
-                            })
-                        else:
-                            # No match found - add item without match
-                            db_line_item = LineItem(
-                                sales_order_id=db_order.id,
-                                description=item["description"],
-                                quantity=item["quantity"],
-                                unit_price=item["unit_price"],
-                                total_price=item["total_price"],
-                                catalog_match_id=None,
-                                catalog_match_data=None,
-                                confidence_score=0,
-                                status="pending"
-                            )
-                            db.add(db_line_item)
-                            
-                            matched_items.append({
-                                "line_item": item,
-                                "catalog_match": None,
-                                "confidence": 0
-                            })
-                    
-                    db.commit()
-                    
-                    return {
-                        "id": db_order.id,
-                        "filename": unique_filename,
-                        "original_filename": original_filename,
-                        "extracted_data": transformed_items,
-                        "matched_items": matched_items
-                    }
-                else:
-                    print(f"Batch match API error: {batch_response.text}")
-                    raise HTTPException(status_code=batch_response.status_code, detail=f"Batch matching failed: {batch_response.text}")
+        catalog_index = _catalog_index()
+    except Exception as e:
+        print(f"Error finding catalog item: {str(e)}")
+        catalog_index = {}
     
-    finally:
-        # Clean up temporary file
-        try:
-            if os.path.exists(file_path):
-                os.unlink(file_path)
-        except Exception as e:
-            print(f"Warning: Could not delete temporary file {file_path}: {str(e)}")
+    # Process matches from the results dictionary, binding hot lookups outside the loop
+    results = batch_matches.get("results", {})
+    matched_items = []
+    line_items_to_insert = []
+    matched_append = matched_items.append
+    insert_append = line_items_to_insert.append
+    for item in transformed_items:
+        description = item["description"]
+        matches = results.get(description, [])
+        print(f"Matches for {description}: {matches}")
+        
+        if matches and len(matches) > 0:
+            best_match = matches[0]
+            confidence = float(best_match.get("score", 0))  # Convert to float
+            catalog_match = best_match.get("match")
+            
+            catalog_item = catalog_index.get(catalog_match)
+            
+            # Queue line item for a single batched insert
+            insert_append({
+                "sales_order_id": db_order.id,
+                "description": item["description"],
+                "quantity": item["quantity"],
+                "unit_price": item["unit_price"],
+                "total_price": item["total_price"],
+                "catalog_match_id": catalog_match,
+                "catalog_match_data": {
+                    "id": catalog_match,
+                    "name": catalog_match,
+                    "description": catalog_match
+                } if catalog_match else None,
+                "confidence_score": confidence,
+                "status": "pending"
+            })
+            
+            matched_append({
+                "line_item": item,
+                "catalog_match": catalog_item,
+                "confidence": confidence
+            })
+        else:
+            # No match found - add item without match
+            insert_append({
+                "sales_order_id": db_order.id,
+                "description": item["description"],
+                "quantity": item["quantity"],
+                "unit_price": item["unit_price"],
+                "total_price": item["total_price"],
+                "catalog_match_id": None,
+                "catalog_match_data": None,
+                "confidence_score": 0,
+                "status": "pending"
+            })
+            
+            matched_append({
+                "line_item": item,
+                "catalog_match": None,
+                "confidence": 0
+            })
+    
+    # Insert all line items in one executemany round trip
+    db.execute(LineItem.__table__.insert(), line_items_to_insert)
+    db.commit()
+    
+    return {
+        "id": db_order.id,
+        "filename": unique_filename,
+        "original_filename": original_filename,
+        "extracted_data": transformed_items,
+        "matched_items": matched_items
+    }
 
 @app.get("/orders")
-def get_orders(db: Session = Depends(get_db)):
-    orders = db.query(SalesOrder).all()
-    return orders
+def get_orders(
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db)
+):
+    # Select only the listed columns as plain rows rather than full ORM entities
+    query = (
+        select(
+            SalesOrder.id,
+            SalesOrder.filename,
+            SalesOrder.original_filename,
+            SalesOrder.status,
+            SalesOrder.created_at
+        )
+        .order_by(SalesOrder.id)
+        .offset(offset)
+        .limit(limit)
+    )
+    return db.execute(query).mappings().all()
 
 @app.get("/orders/{order_id}")
 def get_order(order_id: int, db: Session = Depends(get_db)):
-    order = db.query(SalesOrder).filter(SalesOrder.id == order_id).first()
+    # Load the order and its line items in a single joined query
+    order = (
+        db.query(SalesOrder)
+        .options(joinedload(SalesOrder.line_items))
+        .filter(SalesOrder.id == order_id)
+        .first()
+    )
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    line_items = db.query(LineItem).filter(LineItem.sales_order_id == order_id).all()
     return {
-        "order": order,
-        "line_items": line_items
+        # Line items are returned alongside the order, not nested inside it
+        "order": jsonable_encoder(order, exclude={"line_items"}),
+        "line_items": order.line_items
     }
 
 @app.post("/orders/{order_id}/match")
@@ -339,48 +518,57 @@ async def export_order(order_id: int, db: Session = Depends(get_db)):
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    line_items = db.query(LineItem).filter(LineItem.sales_order_id == order_id).all()
-    
-    # Create CSV content
-    output = StringIO()
-    writer = csv.writer(output)
-    
-    # Write header with simplified columns
-    writer.writerow([
-        "Description",
-        "Quantity",
-        "Unit Price",
-        "Total Price",
-        "Catalog Match"  # Simplified to just show the match name
-    ])
+    # Update order status before streaming so the commit isn't tied to the response
+    order.status = "exported"
+    db.commit()
     
-    # Write data with simplified columns
-    for item in line_items:
+    def row_iter():
+        # Buffer rows and flush in chunks instead of materializing the whole CSV
+        output = StringIO()
+        writer = csv.writer(output)
+        
+        # Write header with simplified columns
         writer.writerow([
-            item.description,
-            item.quantity,
-            item.unit_price,
-            item.total_price,
-            item.catalog_match_data.get("name", "") if item.catalog_match_data else "No match"
+            "Description",
+            "Quantity",
+            "Unit Price",
+            "Total Price",
+            "Catalog Match"  # Simplified to just show the match name
         ])
-    
-    # Update order status
-    order.status = "exported"
-    db.commit()
+        
+        # Write data with simplified columns, fetching line items in batches
+        line_items = (
+            db.query(LineItem)
+            .filter(LineItem.sales_order_id == order_id)
+            .enable_eagerloads(False)
+            .yield_per(500)
+        )
+        for item in line_items:
+            writer.writerow([
+                item.description,
+                item.quantity,
+                item.unit_price,
+                item.total_price,
+                item.catalog_match_data.get("name", "") if item.catalog_match_data else "No match"
+            ])
+            if output.tell() > EXPORT_CHUNK_SIZE:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+        
+        # Flush the remaining rows
+        if output.tell():
+            yield output.getvalue()
     
     # Return CSV file
-    output.seek(0)
     return StreamingResponse(
-        iter([output.getvalue()]),
+        row_iter(),
         media_type="text/csv",
         headers={
             "Content-Disposition": f"attachment; filename=order_{order_id}.csv"
         }
     )
 
-# Get the absolute path to the catalog file
-CATALOG_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "unique_fastener_catalog.csv")
-
 @app.get("/catalog")
 async def get_catalog():
     """Get the catalog items from the CSV file."""
@@ -392,18 +580,7 @@ async def get_catalog():
                 detail=f"Catalog file not found at: {CATALOG_FILE}"
             )
             
-        catalog_items = []
-        with open(CATALOG_FILE, "r", encoding="utf-8") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                # Create a unique ID from the combination of fields
-                item_id = f"{row['Type']}_{row['Material']}_{row['Size']}_{row['Length']}_{row['Coating']}_{row['Thread Type']}"
-                catalog_items.append({
-                    "id": item_id,
-                    "name": f"{row['Type']} {row['Material']} {row['Size']} {row['Length']} {row['Coating']} {row['Thread Type']}",
-                    "description": row["Description"]
-                })
-        return catalog_items
+        return _catalog_items()
     except Exception as e:
         print(f"Error reading catalog file: {str(e)}")
         raise HTTPException(
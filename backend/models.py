@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, JSON, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, JSON, DateTime, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -28,4 +28,9 @@ class LineItem(Base):
     catalog_match_data = Column(JSON, nullable=True)
     confidence_score = Column(Float, nullable=True)
     status = Column(String, default="pending")  # pending, verified, rejected
-    sales_order = relationship("SalesOrder", back_populates="line_items") 
\ No newline at end of file
+    sales_order = relationship("SalesOrder", back_populates="line_items")
+
+    # Covers lookups by order as well as by (order, line item)
+    __table_args__ = (
+        Index("ix_lineitem_order_id_id", "sales_order_id", "id"),
+    ) 
\ No newline at end of file